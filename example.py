@@ -15,29 +15,28 @@ import math
 from sparse_clenshaw_curtis import sparse_grid_nodes_weights
 
 # --- Define Integration Operator ---
-def sparse_grid_integrate(func, dim, level):
+def sparse_grid_integrate(func, nodes, weights):
     """
-    Integrate `func` over [0,1]^dim using sparse grid quadrature of given level.
+    Integrate `func` using precomputed sparse grid quadrature nodes and weights.
     """
-    nodes, weights = sparse_grid_nodes_weights(dim, level)
-    # Vectorized evaluation: func should accept array of shape (N, dim)
-    vals = np.apply_along_axis(func, 1, nodes)
+    # Vectorized evaluation: func accepts array of shape (N, dim), returns shape (N,)
+    vals = func(nodes)
     return np.dot(vals, weights)
 
 # --- Define test functions and exact integrals for d=2 ---
 test_functions = [
     {
-        "func": lambda x: x[0]**x[1],
+        "func": lambda x: x[:, 0]**x[:, 1],
         "exact": math.log(2),      # \int_0^1 x dx = 0.5, so 0.5*0.5 = 0.25
         "label": r"$f(x)=x_1**x_2$"
     },
     {
-        "func": lambda x: np.sin(np.pi * x[0]) * np.sin(np.pi * x[1]),
+        "func": lambda x: np.sin(np.pi * x[:, 0]) * np.sin(np.pi * x[:, 1]),
         "exact": 4 / (np.pi**2),
         "label": r"$f(x)=\sin(\pi x_1)\sin(\pi x_2)$"
     },
     {
-        "func": lambda x: np.exp(x[0] + x[1]),
+        "func": lambda x: np.exp(x.sum(axis=1)),
         "exact": (np.e - 1)**2,
         "label": r"$f(x)=\exp(x_1 + x_2)$"
     },
@@ -54,15 +53,18 @@ if len(test_functions) == 1:
 
 tol = 1e-14  # All errors below this are considered zero
 
-for ax, tf in zip(axes, test_functions):
-    errors = []
-    for l in levels:
-        approx = sparse_grid_integrate(tf["func"], dim=dim, level=l)
-        errors.append(np.abs(approx - tf["exact"]))
-    errors = np.array(errors)
-    # Set errors below tol to zero (for clearer plot & numerical stability)
-    errors = np.where(errors < tol, 0, errors)
-    ax.semilogy(levels, errors, marker='o', label=tf["label"])
+# --- Build each grid once and reuse it for all test functions ---
+errors = np.zeros((len(test_functions), len(levels)))
+for k, l in enumerate(levels):
+    nodes, weights = sparse_grid_nodes_weights(dim, l)
+    for i, tf in enumerate(test_functions):
+        approx = sparse_grid_integrate(tf["func"], nodes, weights)
+        errors[i, k] = np.abs(approx - tf["exact"])
+# Set errors below tol to zero (for clearer plot & numerical stability)
+errors = np.where(errors < tol, 0, errors)
+
+for ax, tf, err in zip(axes, test_functions, errors):
+    ax.semilogy(levels, err, marker='o', label=tf["label"])
     ax.set_xlabel("Sparse Grid Level")
     ax.set_title(f"Test Function: {tf['label']}")
     ax.grid(True, which="both", ls="--")
@@ -7,31 +7,37 @@ over the d-dimensional unit hypercube [a, b]^d, using Clenshaw–Curtis quadratu
 Key features:
     - Closed nonlinear growth rule for one-dimensional quadrature.
     - Generation of multidimensional tensor product rules.
-    - Efficient sparse grid construction with correct Smolyak coefficients.
-    - Flexible interface: returns all nodes and associated weights for further use.
+    - Efficient sparse grid construction from hierarchical difference rules,
+      exploiting the nestedness of the Clenshaw–Curtis nodes.
+    - Flexible interface: returns all (unique) nodes and associated weights for further use.
 
 References
 ----------
 - Smolyak, S. A. "Quadrature and interpolation formulas for tensor products of certain classes of functions." Dokl. Akad. Nauk SSSR, 1963.
 - Bungartz, H.-J., & Griebel, M. "Sparse grids." Acta Numerica, 13, 2004.
+- Waldvogel, J. "Fast construction of the Fejér and Clenshaw–Curtis quadrature rules." BIT Numerical Mathematics, 46, 2006.
 
 Dependencies
 ------------
 - numpy
-- modepy (for Clenshaw–Curtis nodes and weights)
 """
 
-from itertools import product
+from functools import lru_cache, reduce
+from itertools import combinations
 import numpy as np
-from math import comb
-from modepy.quadrature.clenshaw_curtis import _make_clenshaw_curtis_nodes_and_weights
 
 def index_set(dim: int, level: int):
     """
     Construct the multi-index set for the sparse grid according to the Smolyak algorithm.
 
-    For given dimension `dim` and total level `level`, returns all integer multi-indices
-    (i_1, ..., i_dim) satisfying the Smolyak selection rule.
+    For given dimension `dim` and total level `level`, yields all integer multi-indices
+    (i_1, ..., i_dim) with i_k >= 1 and level + 1 <= i_1 + ... + i_dim <= level + dim.
+
+    Only admissible indices are enumerated: for each total s, the compositions of s
+    into `dim` positive parts are generated directly.
+
+    This is the index set of the combination technique. It is kept as public API;
+    `sparse_grid_nodes_weights` enumerates the blocks of its difference form instead.
 
     Parameters
     ----------
@@ -40,14 +46,28 @@ def index_set(dim: int, level: int):
     level : int
         Total (maximum) level of the sparse grid.
 
-    Returns
-    -------
-    list of tuple of int
-        List of multi-indices for the tensor product rules to be combined.
+    Yields
+    ------
+    tuple of int
+        Multi-indices for the tensor product rules to be combined.
+    """
+    for s in range(level + 1, level + dim + 1):
+        yield from _compositions(s, dim)
+
+def _compositions(total: int, parts: int):
+    """
+    Yield all tuples of `parts` positive integers summing to `total`.
+
+    The compositions are generated from the positions of parts - 1 separators.
     """
-    return [idx for idx in product(range(1, level + dim + 1), repeat=dim)
-            if level + 1 <= sum(idx) <= level + dim]
-    
+    if parts == 0:
+        if total == 0:
+            yield ()
+        return
+    for cuts in combinations(range(1, total), parts - 1):
+        bounds = (0,) + cuts + (total,)
+        yield tuple(bounds[k + 1] - bounds[k] for k in range(parts))
+
 def closed_non_linear_growth_rule(level: int) -> int:
     """
     Compute the number of quadrature points for a given level according to the
@@ -75,6 +95,40 @@ def closed_non_linear_growth_rule(level: int) -> int:
     else:
         return 2**(level - 1) + 1
 
+def _clenshaw_curtis_nodes_and_weights(n: int):
+    """
+    Compute the n + 1 Clenshaw–Curtis nodes and weights on [-1, 1] for n >= 1 intervals.
+
+    The weights are obtained with a single real inverse FFT following Waldvogel (2006).
+
+    Parameters
+    ----------
+    n : int
+        Number of intervals (must be >= 1).
+
+    Returns
+    -------
+    x : ndarray, shape (n + 1,)
+        Quadrature nodes cos(k * pi / n), k = 0, ..., n.
+    w : ndarray, shape (n + 1,)
+        Corresponding quadrature weights.
+    """
+    x = np.cos(np.arange(n + 1) * np.pi / n)
+    if n == 1:
+        return x, np.ones(2)
+    odd = np.arange(1, n, 2)
+    r = len(odd)
+    v = np.concatenate([2 / odd / (odd - 2), 1 / odd[-1:], np.zeros(n - r)])
+    v = -v[:-1] - v[:0:-1]
+    g = -np.ones(n)
+    g[r] += n
+    g[n - r] += n
+    v += g / (n**2 - 1 + n % 2)
+    # v is real and symmetric, so its inverse FFT is real
+    w = np.fft.irfft(v[:n // 2 + 1], n=n)
+    return x, np.append(w, w[0])
+
+@lru_cache(maxsize=None)
 def clenshaw_curtis_rule(level: int):
     """
     Construct 1D Clenshaw–Curtis quadrature nodes and weights on [-1, 1].
@@ -82,6 +136,12 @@ def clenshaw_curtis_rule(level: int):
     The number of nodes is determined by the non-linear closed growth rule:
         m = 2^{level-1} + 1
 
+    The rules are nested: the nodes of level l are exactly (bitwise) contained
+    in the nodes of level l + 1.
+
+    Results are cached per level; the returned arrays are read-only and
+    must be copied before being modified.
+
     Parameters
     ----------
     level : int
@@ -95,53 +155,162 @@ def clenshaw_curtis_rule(level: int):
         Corresponding quadrature weights.
     """
     m = closed_non_linear_growth_rule(level)
-    x, w = _make_clenshaw_curtis_nodes_and_weights(m)
+    if m == 1:
+        x, w = np.zeros(1), np.full(1, 2.0)
+    else:
+        x, w = _clenshaw_curtis_nodes_and_weights(m - 1)
+        # cos(pi/2) is not exactly zero; snap the midpoint so it matches level 1
+        x[m // 2] = 0.0
+    x.setflags(write=False)
+    w.setflags(write=False)
     return x, w
 
+def _check_interval(a, b):
+    """
+    Raise a ValueError if the interval [a, b] is empty.
+    """
+    if a >= b:
+        raise ValueError("Empty interval. Check if a < b...!")
+
+def _map_to_interval(points, weights, a, b):
+    """
+    Map nodes and weights from [-1, 1]^d to [a, b]^d in place.
+
+    Parameters
+    ----------
+    points : ndarray of float, shape (n_points, d)
+        Quadrature nodes on [-1, 1]^d, overwritten with the mapped nodes.
+    weights : ndarray of float, shape (n_points,)
+        Quadrature weights, overwritten with the scaled weights.
+    a : float
+        Left endpoint of the integration domain.
+    b : float
+        Right endpoint of the integration domain.
+    """
+    a, b = float(a), float(b)
+    scale = (b - a) / 2
+    shift = (a + b) / 2
+    if not (scale == 1 and shift == 0):
+        points *= scale
+        points += shift
+        weights *= scale ** points.shape[1]
+
 def tensor_product_rule(indices, one_d_rule, a, b):
     """
     Construct a tensor product quadrature rule (nodes and weights) in multiple dimensions.
 
     Nodes are mapped from [-1, 1]^d to the hypercube [a, b]^d.
 
+    Together with `index_set` this gives the terms of the combination technique.
+    It is kept as public API; `sparse_grid_nodes_weights` does not call it.
+
     Parameters
     ----------
     indices : sequence of int
         Levels (one per dimension) for the 1D quadrature rules.
     one_d_rule : callable
         Function returning (nodes, weights) for a given level in 1D.
-    a : int, optional
-        Left endpoint of the integration domain (default is 0).
-    b : int, optional
-        Right endpoint of the integration domain (default is 1).
+    a : float
+        Left endpoint of the integration domain.
+    b : float
+        Right endpoint of the integration domain.
 
     Returns
     -------
-    grid : ndarray, shape (n_points, d)
+    grid : ndarray of float64, shape (n_points, d)
         Array of multidimensional quadrature nodes.
-    weights : ndarray, shape (n_points,)
-        Array of corresponding quadrature weights.
+    weights : ndarray of float64, shape (n_points,)
+        Array of corresponding quadrature weights (a fresh, writable array).
 
     Raises
     ------
     ValueError
         If the interval [a, b] is empty.
-    TypeError
-        If interval endpoints are not integers.
     """
-    if not a < b:
-        raise ValueError("Empty interval. Check if a < b...!")
-    if not type(a) == type(b) == int:
-        raise TypeError("Interval boundaries need to be integers.")
-    pts_1d = [one_d_rule(l)[0] for l in indices]
-    wts_1d = [one_d_rule(l)[1] for l in indices]
-    grid = np.array(list(product(*pts_1d)))
-    weights = np.prod(np.array(list(product(*wts_1d))), axis=1).astype(float)
-    if not (a == -1 and b == 1):
-        grid = (b - a) / 2 * grid + (a + b) / 2
-        weights *= ((b - a) / 2) ** len(indices)
+    _check_interval(a, b)
+    pts_1d, wts_1d = zip(*(one_d_rule(l) for l in indices))
+    mesh = np.meshgrid(*pts_1d, indexing='ij', copy=False)
+    grid = np.stack([m.ravel() for m in mesh], axis=1).astype(np.float64, copy=False)
+    # The float initial value yields a fresh float64 array, also for d = 1
+    weights = reduce(np.multiply.outer, wts_1d, 1.0).ravel()
+    _map_to_interval(grid, weights, a, b)
     return grid, weights
 
+@lru_cache(maxsize=None)
+def hierarchical_rule(max_level: int, one_d_rule=clenshaw_curtis_rule):
+    """
+    Split the 1D rules of levels 1, ..., `max_level` into the points that are new
+    at each level and tabulate their cumulative and difference weights.
+
+    A node belongs to the first level whose rule contains it. For nested rules the
+    new points of all levels together form the nodes of level `max_level`.
+
+    Parameters
+    ----------
+    max_level : int
+        Highest 1D level required.
+    one_d_rule : callable, optional
+        Function returning (nodes, weights) for a given level in 1D
+        (default is `clenshaw_curtis_rule`).
+
+    Returns
+    -------
+    points : tuple of ndarray
+        ``points[l - 1]`` holds the nodes first appearing at level l.
+    cum_weights : tuple of ndarray
+        ``cum_weights[l - 1][:, r]`` is the weight of these nodes in the rule U^r
+        of level r (zero if a node is not part of U^r, column 0 is U^0 = 0).
+    diff_weights : tuple of ndarray
+        ``diff_weights[l - 1][:, r]`` is the weight of these nodes in the
+        difference rule Delta_r = U^r - U^{r-1}.
+
+    Notes
+    -----
+    Results are cached; the returned arrays are read-only.
+    """
+    rules = [one_d_rule(l) for l in range(1, max_level + 1)]
+    sizes = [len(x) for x, _ in rules]
+    nodes, first, inverse = np.unique(np.concatenate([x for x, _ in rules]),
+                                      return_index=True, return_inverse=True)
+    first_level = np.repeat(np.arange(1, max_level + 1), sizes)[first]
+    cum = np.zeros((len(nodes), max_level + 1))
+    offsets = np.cumsum([0] + sizes)
+    for l, (_, w) in enumerate(rules, start=1):
+        cum[inverse[offsets[l - 1]:offsets[l]], l] = w
+    diff = np.zeros_like(cum)
+    diff[:, 1:] = np.diff(cum, axis=1)
+    points, cum_weights, diff_weights = [], [], []
+    for l in range(1, max_level + 1):
+        mask = first_level == l
+        for arr, out in ((nodes[mask], points), (cum[mask], cum_weights), (diff[mask], diff_weights)):
+            arr.setflags(write=False)
+            out.append(arr)
+    return tuple(points), tuple(cum_weights), tuple(diff_weights)
+
+def _fill_block(j, points, weights, q, new_pts, cum_wts, diff_wts):
+    """
+    Write the nodes and weights of the sparse grid block N_{j_1} x ... x N_{j_d}
+    into the preallocated slices `points` and `weights` (initialized to zero).
+
+    The weights are the sum over all i' >= (j_1, ..., j_{d-1}) with |i'| <= q - j_d of
+    Delta_{i_1} x ... x Delta_{i_{d-1}} x U^{q - |i'|}, see `sparse_grid_nodes_weights`.
+    """
+    dim = len(j)
+    s = sum(j)
+    *head, last = j
+    shape = tuple(len(new_pts[l - 1]) for l in j)
+    # Contiguous slices, so these reshapes are views into the output buffers
+    grid = points.reshape(shape + (dim,))
+    for k, m in enumerate(np.meshgrid(*(new_pts[l - 1] for l in j), indexing='ij', sparse=True)):
+        grid[..., k] = m
+    w = weights.reshape(shape)
+    for n in range(q - s + 1):
+        for t in _compositions(n + dim - 1, dim - 1):
+            # i_k = j_k + t_k - 1 for the leading dimensions, |i'| = s - last + n
+            factors = [diff_wts[l - 1][:, l + tk - 1] for l, tk in zip(head, t)]
+            factors.append(cum_wts[last - 1][:, q - (s - last) - n])
+            w += reduce(np.multiply.outer, factors)
+
 def sparse_grid_nodes_weights(dim, level, a = 0, b = 1):
     """
     Construct the nodes and weights for a sparse grid quadrature rule
@@ -155,26 +324,46 @@ def sparse_grid_nodes_weights(dim, level, a = 0, b = 1):
         Number of spatial dimensions.
     level : int
         Total (maximum) level of the sparse grid.
+    a : float, optional
+        Left endpoint of the integration domain (default is 0).
+    b : float, optional
+        Right endpoint of the integration domain (default is 1).
 
     Returns
     -------
-    points : ndarray, shape (n_total_points, dim)
-        All quadrature nodes (not necessarily unique).
-    weights : ndarray, shape (n_total_points,)
-        Corresponding quadrature weights (with Smolyak coefficients applied).
+    points : ndarray, shape (n_points, dim)
+        Unique quadrature nodes.
+    weights : ndarray, shape (n_points,)
+        Corresponding quadrature weights.
+
+    Raises
+    ------
+    ValueError
+        If the interval [a, b] is empty.
 
     Notes
     -----
-    - Some nodes may appear multiple times with different weights.
-      For best efficiency, unique nodes should be merged and their weights summed.
-    """
-    all_points = []
-    all_weights = []
-    for idx in index_set(dim, level):
-        coeff = (-1) ** (level + dim - sum(idx)) * comb(dim - 1, level + dim - sum(idx))
-        x, w = tensor_product_rule(idx, clenshaw_curtis_rule, a, b)
-        for xi, wi in zip(x, w):
-            all_points.append(tuple(xi))
-            all_weights.append(coeff * wi)
-    return np.array(all_points), np.array(all_weights)
-
+    - The Smolyak rule is written as a sum of tensor products of difference rules,
+      A(q, d) = sum_{|i| <= q} Delta_{i_1} x ... x Delta_{i_d} with q = level + dim.
+      Since the Clenshaw–Curtis rules are nested, the sparse grid is the disjoint
+      union of the blocks N_{j_1} x ... x N_{j_d}, |j| <= q, of points new at levels j_k.
+      Each block is built exactly once, so every node appears exactly once.
+    - On a block j only the terms i >= j contribute. Summing Delta_{i_d} over the
+      last dimension telescopes to U^{q - |i'|}, leaving a sum over i' = (i_1, ..., i_{d-1}).
+    - The block sizes are known in advance, so the output arrays are allocated once
+      and every block is written directly into its slice.
+    """
+    _check_interval(a, b)
+    q = level + dim
+    new_pts, cum_wts, diff_wts = hierarchical_rule(level + 1)
+    blocks = [j for s in range(dim, q + 1) for j in _compositions(s, dim)]
+    # Block sizes in one pass over the (n_blocks, dim) array of levels
+    counts = np.array([len(x) for x in new_pts], dtype=np.int64)
+    sizes = counts[np.array(blocks, dtype=np.int64) - 1].prod(axis=1)
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    points = np.empty((offsets[-1], dim))
+    weights = np.zeros(offsets[-1])
+    for j, lo, hi in zip(blocks, offsets[:-1], offsets[1:]):
+        _fill_block(j, points[lo:hi], weights[lo:hi], q, new_pts, cum_wts, diff_wts)
+    _map_to_interval(points, weights, a, b)
+    return points, weights